@@ -1,8 +1,20 @@
 from arbitrage_scanner import ArbitrageScanner
+from concurrent.futures import ThreadPoolExecutor
+import csv
+import numpy as np
 import pandas as pd
 from datetime import datetime, time, timedelta, timezone
 from tabulate import tabulate
-import pytz
+from zoneinfo import ZoneInfo
+
+# Optional: numba JIT-compiles the pair-scan kernel. Per-symbol groups are
+# only a handful of rows, which is too small for NumPy broadcasting to shine;
+# one C-level pass over all symbols avoids the per-group dispatch overhead.
+try:
+    from numba import njit
+    HAS_NUMBA = True
+except ImportError:
+    HAS_NUMBA = False
 
 # Constants
 TARGET_HOURS_BOGOTA = [7, 11, 15, 19, 23] # UTC-5
@@ -10,14 +22,96 @@ UTC_OFFSET = -5
 POSITION_SIZE = 500
 LEVERAGE = 10
 MIN_VOLUME_1M = 10
+ENRICH_WORKERS = 32  # Threads for per-candidate volume/interval/fee lookups
+OUTPUT_CSV = 'advanced_opportunities.csv'
+PREVIEW_ROWS = 10
+
+# Column order of the output CSV (user-requested layout)
+OPPORTUNITY_FIELDS = [
+    'FECHA', 'HORA', 'PAR', 'VALOR_OP', 'LEVERAGE',
+    'LONG_EXCH', 'LONG_RATE', 'LONG_NEXT', 'LONG_INTERVAL', 'LONG_VOL_1M',
+    'LONG_FEE_TAKER', 'LONG_FEE_MAKER',
+    'SHORT_EXCH', 'SHORT_RATE', 'SHORT_NEXT', 'SHORT_INTERVAL', 'SHORT_VOL_1M',
+    'SHORT_FEE_TAKER', 'SHORT_FEE_MAKER',
+    'SPREAD', 'ASYMMETRIC',
+]
+
+# stdlib ZoneInfo caches the parsed tzdata internally (and is faster than
+# pytz for astimezone conversions)
+BOGOTA_TZ = ZoneInfo('America/Bogota')
+
+# System timezone, to keep the vectorized next-funding formatting identical
+# to the datetime.fromtimestamp() local-time output it replaces
+LOCAL_TZ = datetime.now().astimezone().tzinfo
+
+# 24-entry LUT: HOUR_BIT[h] has bit i set iff Bogota hour h is
+# TARGET_HOURS_BOGOTA[i], so slot membership is one array index plus a
+# bitwise AND instead of list construction and `in` scans.
+HOUR_BIT = np.zeros(24, dtype=np.uint8)
+for _i, _h in enumerate(TARGET_HOURS_BOGOTA):
+    HOUR_BIT[_h] = 1 << _i
+
+# Single-bit masks per target-hour slot, for unpacking row bitmasks
+SLOT_BIT = (np.uint8(1) << np.arange(len(TARGET_HOURS_BOGOTA), dtype=np.uint8))
+
+# Fallback when next_funding_time is unknown: assume the standard 8h schedule
+# (00/08/16 UTC), which pays at 19:00 and 11:00 Bogota (see
+# check_funding_time_match for the full reasoning).
+FALLBACK_BITS = np.uint8(HOUR_BIT[11] | HOUR_BIT[19])
 
 def get_next_target_hour():
     """Calculates the upcoming target hours for display."""
     now_utc = datetime.now(timezone.utc)
-    bogota_tz = pytz.timezone('America/Bogota')
-    now_bogota = now_utc.astimezone(bogota_tz)
+    now_bogota = now_utc.astimezone(BOGOTA_TZ)
     return now_bogota
 
+def compute_charge_mask(ts_ms_array):
+    """
+    Vectorized equivalent of calling check_funding_time_match once per
+    (row, target hour). Takes an array of next-funding timestamps (ms) and
+    returns an (N, 5) bool matrix of which target hours each row charges at.
+    Null/NaN timestamps get the standard-8h fallback mask.
+    """
+    ts = pd.to_numeric(pd.Series(ts_ms_array), errors='coerce')
+    # Matches the falsy check in check_funding_time_match: 0 means "unknown"
+    valid = (ts.notna() & (ts != 0)).to_numpy()
+
+    # One uint8 bitmask per row via the HOUR_BIT LUT
+    bits = np.full(len(ts), FALLBACK_BITS, dtype=np.uint8)
+
+    if valid.any():
+        # One vectorized tz conversion for all rows instead of per-row
+        # fromtimestamp/astimezone round-trips.
+        hours = (
+            pd.to_datetime(ts[valid], unit='ms', utc=True)
+            .dt.tz_convert(BOGOTA_TZ)
+            .dt.hour
+            .to_numpy()
+        )
+        bits[valid] = HOUR_BIT[hours]
+
+    # Unpack to the (N, 5) bool layout the spread scans consume
+    return (bits[:, None] & SLOT_BIT[None, :]) != 0
+
+def format_next_funding(ts_ms_array):
+    """
+    Batch-formats next-funding timestamps (ms) to 'HH:MM' local-time strings
+    in one pandas pass; null/zero timestamps become 'N/A'. Replaces per-row
+    datetime.fromtimestamp().strftime() calls in the output loop.
+    """
+    ts = pd.to_numeric(pd.Series(ts_ms_array), errors='coerce')
+    valid = (ts.notna() & (ts != 0)).to_numpy()
+
+    out = np.full(len(ts), 'N/A', dtype=object)
+    if valid.any():
+        out[valid] = (
+            pd.to_datetime(ts[valid], unit='ms', utc=True)
+            .dt.tz_convert(LOCAL_TZ)
+            .dt.strftime('%H:%M')
+            .to_numpy()
+        )
+    return out
+
 def check_funding_time_match(timestamp_ms, target_hour):
     """
     Checks if the funding timestamp matches the target hour in Bogota time.
@@ -35,199 +129,304 @@ def check_funding_time_match(timestamp_ms, target_hour):
         # So standard exchanges pay at 11am and 7pm Bogota.
         # They do NOT pay at 7am or 3pm Bogota usually (that would be 12 UTC or 20 UTC).
         # We can assume True if target is 11 or 19.
-        if target_hour in [11, 19]:
-            return True
-        return False
+        return bool(HOUR_BIT[target_hour] & FALLBACK_BITS)
     
     dt_utc = datetime.fromtimestamp(timestamp_ms / 1000, tz=timezone.utc)
-    bogota_tz = pytz.timezone('America/Bogota')
-    dt_bogota = dt_utc.astimezone(bogota_tz)
+    dt_bogota = dt_utc.astimezone(BOGOTA_TZ)
     
     # Allow 5 minute buffer? Usually funding is exact hour.
     # Check if hour matches
     return dt_bogota.hour == target_hour
 
+def _find_best_pairs(symbol_offsets, rates, charge_masks, threshold):
+    """
+    Scans every (long, short, hour) combination of every symbol in one call.
+
+    symbol_offsets: CSR-style int64[n_symbols + 1] offsets into the flat,
+    symbol-sorted `rates` (float64[n_rows]) and `charge_masks`
+    (bool[n_rows, 5]) arrays.
+
+    Returns parallel arrays (symbol_idx, long_idx, short_idx, hour_idx,
+    spread) for every combination whose spread exceeds `threshold`;
+    long_idx/short_idx are global row indices. Compiled with numba when
+    available (two passes: count, then fill preallocated output).
+    """
+    n_symbols = symbol_offsets.shape[0] - 1
+    n_hours = charge_masks.shape[1]
+
+    count = 0
+    for s in range(n_symbols):
+        lo = symbol_offsets[s]
+        hi = symbol_offsets[s + 1]
+        for i in range(lo, hi):
+            for j in range(lo, hi):
+                if i == j:
+                    continue
+                for h in range(n_hours):
+                    eff_i = rates[i] if charge_masks[i, h] else 0.0
+                    eff_j = rates[j] if charge_masks[j, h] else 0.0
+                    if eff_j - eff_i > threshold:
+                        count += 1
+
+    out_sym = np.empty(count, dtype=np.int64)
+    out_i = np.empty(count, dtype=np.int64)
+    out_j = np.empty(count, dtype=np.int64)
+    out_h = np.empty(count, dtype=np.int64)
+    out_spread = np.empty(count, dtype=np.float64)
+
+    pos = 0
+    for s in range(n_symbols):
+        lo = symbol_offsets[s]
+        hi = symbol_offsets[s + 1]
+        for i in range(lo, hi):
+            for j in range(lo, hi):
+                if i == j:
+                    continue
+                for h in range(n_hours):
+                    eff_i = rates[i] if charge_masks[i, h] else 0.0
+                    eff_j = rates[j] if charge_masks[j, h] else 0.0
+                    spread = eff_j - eff_i
+                    if spread > threshold:
+                        out_sym[pos] = s
+                        out_i[pos] = i
+                        out_j[pos] = j
+                        out_h[pos] = h
+                        out_spread[pos] = spread
+                        pos += 1
+
+    return out_sym, out_i, out_j, out_h, out_spread
+
+if HAS_NUMBA:
+    _find_best_pairs = njit(cache=True)(_find_best_pairs)
+
+def fetch_candidate_metrics(scanner, symbol, long_exch, short_exch):
+    """
+    Fetches the expensive per-candidate metrics (volume, funding interval,
+    fees for both legs). Safe to run from worker threads: ccxt instances
+    apply their own rate limiting and the scanner caches are per-pair.
+    """
+    vol_l = scanner.get_volume_1h(long_exch, symbol)
+    vol_s = scanner.get_volume_1h(short_exch, symbol)
+    int_l = scanner.get_funding_interval(long_exch, symbol)
+    int_s = scanner.get_funding_interval(short_exch, symbol)
+    l_fees = scanner.get_fees(long_exch, symbol)
+    s_fees = scanner.get_fees(short_exch, symbol)
+    return vol_l, vol_s, int_l, int_s, l_fees, s_fees
+
 def main():
     scanner = ArbitrageScanner()
     
     print(f"Starting Advanced Scan for target hours (UTC-5): {TARGET_HOURS_BOGOTA}")
     print("Fetching funding rates...")
-    df_rates = scanner.fetch_funding_rates()
-    
-    if df_rates.empty:
+
+    # Consume per-exchange chunks as each fetch lands: the charge-hour mask
+    # and next-funding formatting for fast exchanges are computed while the
+    # slow ones are still in flight, so only the pairing waits for the
+    # slowest exchange.
+    ex_col = []
+    sym_col = []
+    rate_col = []
+    mask_parts = []
+    ntf_str_parts = []
+
+    for chunk in scanner.iter_funding_rates():
+        ntf = np.asarray(chunk['next_funding_times'], dtype=np.float64)
+        ex_col.extend([chunk['exchange']] * len(chunk['symbols']))
+        sym_col.extend(chunk['symbols'])
+        rate_col.extend(chunk['funding_rates'])
+        mask_parts.append(compute_charge_mask(ntf))
+        ntf_str_parts.append(format_next_funding(ntf))
+
+    if not sym_col:
         print("No data fetched.")
         return
 
-    # Pivot Data
-    # We need a different approach than simple pivot because we need next_funding_time
-    # Group by symbol
-    grouped = df_rates.groupby('symbol')
-    
-    opportunities = []
-    
-    bogota_tz = pytz.timezone('America/Bogota')
-    current_date = datetime.now(bogota_tz).strftime('%Y-%m-%d')
-    
-    print(f"Analyzing {len(grouped)} pairs...")
-    
-    for symbol, group in grouped:
-        if len(group) < 2:
-            continue
-            
-        # Iterate through target hours to see if this pair is relevant
-        # Simplifying: User wants to verify options FOR specific hours.
-        # We check each possible pair combination (Exchange A, Exchange B)
-        
-        exchanges = group.to_dict('records')
-        
-        # O(N^2) comparison for this symbol
-        for i in range(len(exchanges)):
-            for j in range(i + 1, len(exchanges)):
-                a = exchanges[i]
-                b = exchanges[j]
-                
-                # Check for each target hour
-                for target_hour in TARGET_HOURS_BOGOTA:
-                    
-                    # Check if each exchange charges at this hour
-                    a_charges = check_funding_time_match(a.get('next_funding_time'), target_hour)
-                    b_charges = check_funding_time_match(b.get('next_funding_time'), target_hour)
-                    
-                    # Logic:
-                    # Long A, Short B
-                    # Cost = Rate A (if charges) + Rate B (if charges, usually negative for short?)
-                    # Funding Rate is usually received by Long if positive? No.
-                    # POSITIVE Rate = Long PAYS Short.
-                    # NEGATIVE Rate = Short PAYS Long.
-                    
-                    # We want to Receive Funding.
-                    # Best Case: Long (Positive Rate -> Pay? No, Negative -> Receive)
-                    # Let's verify standard perps:
-                    # +Rate: Long pays Short.
-                    # -Rate: Short pays Long.
-                    
-                    # We want to be Short on +Rate (Receive)
-                    # We want to be Long on -Rate (Receive)
-                    
-                    # Strategy: Long A, Short B.
-                    # Net Rate = (Rate B * -1) - (Rate A) ? 
-                    # If we Long A: pay Rate A. (If Rate A is -0.01%, we receive 0.01%) -> -Rate A
-                    # If we Short B: receive Rate B. (If Rate B is 0.01%, we receive 0.01%) -> Rate B
-                    
-
-                    # Net Profit % = (Rate B if charges) - (Rate A if charges)
-                    # Wait, careful with signs.
-                    # Cashflow Long = -RateA
-                    # Cashflow Short = +RateB
-                    # Net = RateB - RateA.
-                    
-                    # Adjustment for "Does not charge":
-                    rate_a_eff = a['funding_rate'] if a_charges else 0
-                    rate_b_eff = b['funding_rate'] if b_charges else 0
-                    
-                    # Spread direction 1: Long A, Short B
-                    spread_1 = rate_b_eff - rate_a_eff
-                    
-                    # Spread direction 2: Long B, Short A
-                    spread_2 = rate_a_eff - rate_b_eff
-                    
-                    best_spread = 0
-                    long_side = None
-                    short_side = None
-                    
-                    if spread_1 > spread_2:
-                        best_spread = spread_1
-                        long_side = a
-                        short_side = b
-                    else:
-                        best_spread = spread_2
-                        long_side = b
-                        short_side = a
-                        
-                    if best_spread > 0.004:
-                        # We have a candidate!
-                        # Now check Volume
-                        vol_l = scanner.get_volume_1h(long_side['exchange'], symbol)
-                        vol_s = scanner.get_volume_1h(short_side['exchange'], symbol)
-                        
-                        # STRICT VOLUME CHECK
-                        # User specified MIN_VOLUME_1M = 30000
-                        min_volume_required = MIN_VOLUME_1M
-                        
-                        if (vol_l is None or vol_l < min_volume_required) or (vol_s is None or vol_s < min_volume_required):
-                            # print(f"Skipping {symbol} ({long_side['exchange']}/{short_side['exchange']}) due to low volume: L={vol_l} S={vol_s} Req={min_volume_required}")
-                            continue
-
-                        # Check Intervals
-                        int_l = scanner.get_funding_interval(long_side['exchange'], symbol)
-                        int_s = scanner.get_funding_interval(short_side['exchange'], symbol)
-                        
-                        is_asymmetric = (int_l != int_s)
-
-                        # Fetch Fees
-                        # Need to access scanner.exchanges[name].market(symbol)
-                        # Warning: Some symbols in scanner might be standard, but market access requires specific symbol? 
-                        # Usually ccxt normalizes it.
-                        
-                        def get_fees(exch_name, sym):
-                            try:
-                                ex = scanner.exchanges.get(exch_name)
-                                if not ex: return 0.0005, 0.0002 # Default
-                                m = ex.market(sym)
-                                # Try to get fee tiers, otherwise default to taker/maker
-                                taker = m.get('taker', m.get('feeSide', 'get') == 'get' and 0.0005) # Fallback 0.05%
-                                maker = m.get('maker', m.get('feeSide', 'make') == 'make' and 0.0002) # Fallback 0.02%
-                                # Helper: standard perps usually 0.05% taker, 0.02% maker
-                                if taker is None: taker = 0.0005
-                                if maker is None: maker = 0.0002
-                                return taker, maker
-                            except:
-                                return 0.0005, 0.0002
-
-                        l_taker, l_maker = get_fees(long_side['exchange'], symbol)
-                        s_taker, s_maker = get_fees(short_side['exchange'], symbol)
-                        
-                        # User requested columns:
-                        # % COMISION TAKER, % COMISION MAKER
-                        
-                        # Format Output
-                        opp = {
-                            'FECHA': current_date,
-                            'HORA': f"{target_hour}:00",
-                            'PAR': symbol,
-                            'VALOR_OP': POSITION_SIZE,
-                            'LEVERAGE': LEVERAGE,
-                            'LONG_EXCH': long_side['exchange'],
-                            'LONG_RATE': long_side['funding_rate'],
-                            'LONG_NEXT': datetime.fromtimestamp(long_side['next_funding_time']/1000).strftime('%H:%M') if long_side.get('next_funding_time') else 'N/A',
-                            'LONG_INTERVAL': int_l,
-                            'LONG_VOL_1M': vol_l,
-                            'LONG_FEE_TAKER': l_taker,
-                            'LONG_FEE_MAKER': l_maker,
-                            'SHORT_EXCH': short_side['exchange'],
-                            'SHORT_RATE': short_side['funding_rate'],
-                            'SHORT_NEXT': datetime.fromtimestamp(short_side['next_funding_time']/1000).strftime('%H:%M') if short_side.get('next_funding_time') else 'N/A',
-                            'SHORT_INTERVAL': int_s,
-                            'SHORT_VOL_1M': vol_s,
-                            'SHORT_FEE_TAKER': s_taker,
-                            'SHORT_FEE_MAKER': s_maker,
-                            'SPREAD': best_spread,
-                            'ASYMMETRIC': 'Yes' if is_asymmetric else 'No'
-                        }
-                        opportunities.append(opp)
-                        print(f"Found: {symbol} Spread: {best_spread:.4%} for {target_hour}:00 (Asym: {opp['ASYMMETRIC']})")
-
-    if not opportunities:
+    df_rates = pd.DataFrame({
+        'exchange': ex_col,
+        'symbol': sym_col,
+        # float32 precision is ample for funding rates (1e-5..1e-3) and
+        # halves memory bandwidth in the spread matrices
+        'funding_rate': np.asarray(rate_col, dtype=np.float32),
+    })
+    charge_mask = np.vstack(mask_parts)
+    next_funding_str = np.concatenate(ntf_str_parts)
+
+    current_date = datetime.now(BOGOTA_TZ).strftime('%Y-%m-%d')
+
+    # Phase 1: spread scan. Candidates are cheap tuples here; the
+    # network-bound enrichment happens in parallel afterwards.
+    #
+    # Funding sign convention for standard perps:
+    # +Rate: Long pays Short.
+    # -Rate: Short pays Long.
+    # Strategy Long A / Short B:
+    # Cashflow Long = -RateA, Cashflow Short = +RateB -> Net = RateB - RateA.
+    # Rates are zeroed on hours a listing doesn't charge at.
+    candidates = []
+
+    if HAS_NUMBA:
+        # Flat CSR layout over a symbol-sorted frame: one JIT kernel call
+        # for all symbols instead of per-group NumPy dispatch.
+        df_sorted = df_rates.sort_values('symbol', kind='stable')
+        row_order = df_sorted.index.to_numpy()
+        symbols_arr = df_sorted['symbol'].to_numpy()
+        rates_arr = df_sorted['funding_rate'].to_numpy(dtype=np.float32)
+        exch_names = df_sorted['exchange'].tolist()
+        next_strs = next_funding_str[row_order]
+
+        _, starts = np.unique(symbols_arr, return_index=True)
+        offsets = np.append(starts, len(symbols_arr)).astype(np.int64)
+
+        print(f"Analyzing {len(starts)} pairs...")
+
+        _, long_idx, short_idx, hour_idx, spreads = _find_best_pairs(
+            offsets, rates_arr, charge_mask[row_order], 0.004)
+
+        for i, j, k, sp in zip(long_idx, short_idx, hour_idx, spreads):
+            candidates.append({
+                'symbol': symbols_arr[i],
+                'target_hour': TARGET_HOURS_BOGOTA[k],
+                'spread': float(sp),
+                'long_exch': exch_names[i],
+                'long_rate': rates_arr[i],
+                'long_next': next_strs[i],
+                'short_exch': exch_names[j],
+                'short_rate': rates_arr[j],
+                'short_next': next_strs[j],
+            })
+    else:
+        # Pivot Data
+        # We need a different approach than simple pivot because we need next_funding_time
+        # Group by symbol (sort=False: order doesn't matter, skip the sort)
+        grouped = df_rates.groupby('symbol', sort=False)
+
+        print(f"Analyzing {len(grouped)} pairs...")
+
+        for symbol, group in grouped:
+            n = len(group)
+            if n < 2:
+                continue
+
+            # Columnar views for this symbol (avoids building N dicts per group)
+            group_rows = group.index.to_numpy()
+            rates = group['funding_rate'].to_numpy(dtype=np.float32)
+            exch_names = group['exchange'].tolist()
+            next_strs = next_funding_str[group_rows]
+
+            # Which target hours does each listing charge at? Shape (n, 5) bool.
+            charges = charge_mask[group_rows]
+
+            # Effective rate per (listing, hour): zero when it doesn't charge then.
+            rate_eff = rates[:, None] * charges                    # (n, 5)
+
+            # spread[i, j, k] = net profit of Long i / Short j at hour k.
+            # One broadcasted subtraction replaces the O(n^2 * 5) Python loop.
+            spread = rate_eff[None, :, :] - rate_eff[:, None, :]   # (n, n, 5)
+
+            # The matrix is antisymmetric in (i, j), so thresholding the full
+            # matrix keeps exactly the profitable direction of each pair
+            # (the diagonal is zero and never passes).
+            for i, j, k in np.argwhere(spread > 0.004):
+                candidates.append({
+                    'symbol': symbol,
+                    'target_hour': TARGET_HOURS_BOGOTA[k],
+                    'spread': float(spread[i, j, k]),
+                    'long_exch': exch_names[i],
+                    'long_rate': rates[i],
+                    'long_next': next_strs[i],
+                    'short_exch': exch_names[j],
+                    'short_rate': rates[j],
+                    'short_next': next_strs[j],
+                })
+
+    if candidates:
+        # Phase 2: enrich in parallel, once per unique (symbol, long, short)
+        # pair. The same pair can cross the threshold for several target
+        # hours (8h-funding listings always match both fallback hours), so
+        # only target hour / spread / formatting differ between those rows.
+        unique_pairs = list({
+            (c['symbol'], c['long_exch'], c['short_exch']) for c in candidates
+        })
+        print(f"Enriching {len(unique_pairs)} unique pairs ({len(candidates)} candidates)...")
+        with ThreadPoolExecutor(max_workers=ENRICH_WORKERS) as executor:
+            pair_metrics = dict(zip(
+                unique_pairs,
+                executor.map(lambda p: fetch_candidate_metrics(scanner, *p), unique_pairs)
+            ))
+    else:
+        pair_metrics = {}
+
+    # Phase 3: filter and stream output rows straight to the CSV. Only a
+    # small preview buffer stays in memory, so peak RSS no longer grows
+    # with the number of opportunities.
+    n_found = 0
+    preview = []
+
+    with open(OUTPUT_CSV, 'w', newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=OPPORTUNITY_FIELDS)
+        writer.writeheader()
+
+        for cand in candidates:
+            vol_l, vol_s, int_l, int_s, l_fees, s_fees = \
+                pair_metrics[(cand['symbol'], cand['long_exch'], cand['short_exch'])]
+            symbol = cand['symbol']
+            target_hour = cand['target_hour']
+            best_spread = cand['spread']
+
+            # STRICT VOLUME CHECK
+            # User specified MIN_VOLUME_1M = 30000
+            min_volume_required = MIN_VOLUME_1M
+
+            if (vol_l is None or vol_l < min_volume_required) or (vol_s is None or vol_s < min_volume_required):
+                # print(f"Skipping {symbol} ({cand['long_exch']}/{cand['short_exch']}) due to low volume: L={vol_l} S={vol_s} Req={min_volume_required}")
+                continue
+
+            is_asymmetric = (int_l != int_s)
+
+            l_taker, l_maker = l_fees
+            s_taker, s_maker = s_fees
+
+            # User requested columns:
+            # % COMISION TAKER, % COMISION MAKER
+
+            # Format Output
+            opp = {
+                'FECHA': current_date,
+                'HORA': f"{target_hour}:00",
+                'PAR': symbol,
+                'VALOR_OP': POSITION_SIZE,
+                'LEVERAGE': LEVERAGE,
+                'LONG_EXCH': cand['long_exch'],
+                'LONG_RATE': cand['long_rate'],
+                'LONG_NEXT': cand['long_next'],
+                'LONG_INTERVAL': int_l,
+                'LONG_VOL_1M': vol_l,
+                'LONG_FEE_TAKER': l_taker,
+                'LONG_FEE_MAKER': l_maker,
+                'SHORT_EXCH': cand['short_exch'],
+                'SHORT_RATE': cand['short_rate'],
+                'SHORT_NEXT': cand['short_next'],
+                'SHORT_INTERVAL': int_s,
+                'SHORT_VOL_1M': vol_s,
+                'SHORT_FEE_TAKER': s_taker,
+                'SHORT_FEE_MAKER': s_maker,
+                'SPREAD': best_spread,
+                'ASYMMETRIC': 'Yes' if is_asymmetric else 'No'
+            }
+            writer.writerow(opp)
+            n_found += 1
+            if len(preview) < PREVIEW_ROWS:
+                preview.append(opp)
+            print(f"Found: {symbol} Spread: {best_spread:.4%} for {target_hour}:00 (Asym: {opp['ASYMMETRIC']})")
+
+    if n_found == 0:
         print("No opportunities found matching criteria and time slots.")
         return
-        
-    # Convert to DF and Save
-    df_final = pd.DataFrame(opportunities)
-    df_final.to_csv('advanced_opportunities.csv', index=False)
-    print("\nSaved to advanced_opportunities.csv")
-    
+
+    print(f"\nSaved to {OUTPUT_CSV}")
+
     # Print preview
-    print(tabulate(df_final.head(10), headers='keys', tablefmt='psql'))
+    print(tabulate(pd.DataFrame(preview), headers='keys', tablefmt='psql'))
 
     if scanner.skipped_exchanges:
         print("\n" + "="*50)
@@ -1,74 +1,206 @@
 import ccxt
+import numpy as np
 import pandas as pd
+import time
 from datetime import datetime
 
+# Cache TTLs in seconds. Volume is refreshed per OHLCV candle; intervals and
+# fees are market metadata and effectively stable within a scan.
+VOLUME_CACHE_TTL = 60
+INTERVAL_CACHE_TTL = 3600
+FEE_CACHE_TTL = 3600
+
+class _LazyExchangeDict:
+    """
+    Dict-like view over ccxt exchange factories that instantiates each
+    client on first access. Constructing a ccxt client parses its market
+    manifest, so building all 18 eagerly wastes init time and memory when
+    a caller only needs a few exchanges.
+    """
+    def __init__(self, factories):
+        self._factories = factories
+        self._instances = {}
+
+    def __getitem__(self, name):
+        instance = self._instances.get(name)
+        if instance is None:
+            instance = self._factories[name]()
+            self._instances[name] = instance
+        return instance
+
+    def get(self, name, default=None):
+        if name not in self._factories:
+            return default
+        return self[name]
+
+    def __contains__(self, name):
+        return name in self._factories
+
+    def __iter__(self):
+        return iter(self._factories)
+
+    def __len__(self):
+        return len(self._factories)
+
+    def keys(self):
+        return self._factories.keys()
+
+    def items(self):
+        for name in self._factories:
+            yield name, self[name]
+
 class ArbitrageScanner:
-    def __init__(self):
+    def __init__(self, enabled=None):
+        """
+        enabled: optional list of exchange names to restrict the scan to
+        (e.g. ['binance', 'bybit']); defaults to all supported exchanges.
+        """
         self.skipped_exchanges = []
-        self.exchanges = {
-            'binance': ccxt.binance({'enableRateLimit': True}),
-            'bybit': ccxt.bybit({'enableRateLimit': True}),
-            'okx': ccxt.okx({'enableRateLimit': True}),
-            'kucoin': ccxt.kucoin({'enableRateLimit': True}),
-            'xt': ccxt.xt({'enableRateLimit': True}),
-            'gateio': ccxt.gateio({
+        # TTL caches keyed by (exchange_name, symbol) -> (value, monotonic_ts).
+        # The same pair can surface as a candidate for several target hours,
+        # so without these we'd repeat the HTTP/ccxt work up to 5x.
+        self._vol_cache = {}
+        self._int_cache = {}
+        self._fee_cache = {}
+        # Direct references to each exchange's markets dict so metadata
+        # lookups are plain dict gets instead of exchange.market() wrappers
+        # (which may retrigger load_markets).
+        self._markets = {}
+        factories = {
+            'binance': lambda: ccxt.binance({'enableRateLimit': True}),
+            'bybit': lambda: ccxt.bybit({'enableRateLimit': True}),
+            'okx': lambda: ccxt.okx({'enableRateLimit': True}),
+            'kucoin': lambda: ccxt.kucoin({'enableRateLimit': True}),
+            'xt': lambda: ccxt.xt({'enableRateLimit': True}),
+            'gateio': lambda: ccxt.gateio({
                 'enableRateLimit': True,
                 'options': {
                     'adjustForTimeDifference': True
                 }
             }),
-            'coinex': ccxt.coinex({'enableRateLimit': True}),
-            'bitget': ccxt.bitget({'enableRateLimit': True}),
-            'mexc': ccxt.mexc({'enableRateLimit': True}),
-            'htx': ccxt.htx({'enableRateLimit': True}), # Huobi
-            'kraken': ccxt.kraken({'enableRateLimit': True}),
-            'deribit': ccxt.deribit({'enableRateLimit': True}),
-            'bitmex': ccxt.bitmex({'enableRateLimit': True}),
-            'bingx': ccxt.bingx({'enableRateLimit': True}),
-            'bitmart': ccxt.bitmart({'enableRateLimit': True}),
-            'lbank': ccxt.lbank({'enableRateLimit': True}),
-            'deepcoin': ccxt.deepcoin({'enableRateLimit': True}),
-            'toobit': ccxt.toobit({'enableRateLimit': True}),
+            'coinex': lambda: ccxt.coinex({'enableRateLimit': True}),
+            'bitget': lambda: ccxt.bitget({'enableRateLimit': True}),
+            'mexc': lambda: ccxt.mexc({'enableRateLimit': True}),
+            'htx': lambda: ccxt.htx({'enableRateLimit': True}), # Huobi
+            'kraken': lambda: ccxt.kraken({'enableRateLimit': True}),
+            'deribit': lambda: ccxt.deribit({'enableRateLimit': True}),
+            'bitmex': lambda: ccxt.bitmex({'enableRateLimit': True}),
+            'bingx': lambda: ccxt.bingx({'enableRateLimit': True}),
+            'bitmart': lambda: ccxt.bitmart({'enableRateLimit': True}),
+            'lbank': lambda: ccxt.lbank({'enableRateLimit': True}),
+            'deepcoin': lambda: ccxt.deepcoin({'enableRateLimit': True}),
+            'toobit': lambda: ccxt.toobit({'enableRateLimit': True}),
         }
+        if enabled is not None:
+            unknown = [name for name in enabled if name not in factories]
+            if unknown:
+                print(f"Warning: ignoring unknown exchanges: {unknown}")
+            factories = {name: factories[name] for name in enabled if name in factories}
+        self.exchanges = _LazyExchangeDict(factories)
+        self._preload_markets()
 
-    def fetch_funding_rates(self, symbols=None):
+    def _preload_markets(self):
+        """Loads markets for all enabled exchanges in parallel and caches the dicts."""
+        import concurrent.futures
+
+        def load(name):
+            try:
+                # Instantiate inside the worker so client construction
+                # (market manifest parsing) is parallelized too
+                exchange = self.exchanges[name]
+                exchange.load_markets()
+                self._markets[name] = exchange.markets
+            except Exception as e:
+                print(f"Error loading markets for {name}: {e}")
+
+        with concurrent.futures.ThreadPoolExecutor(max_workers=len(self.exchanges)) as executor:
+            for name in self.exchanges:
+                executor.submit(load, name)
+
+    def iter_funding_rates(self, symbols=None):
         """
-        Fetches funding rates from all configured exchanges in parallel.
-        Returns a DataFrame with the data.
+        Fetches funding rates from all configured exchanges in parallel and
+        yields one chunk per exchange as soon as that exchange's fetch
+        completes. Each chunk is a dict with 'exchange' plus parallel
+        'symbols', 'funding_rates' and 'next_funding_times' lists, so
+        callers can start processing while slower exchanges are in flight.
         """
-        all_rates = []
         import concurrent.futures
 
         print("Fetching funding rates in parallel...")
 
         with concurrent.futures.ThreadPoolExecutor(max_workers=len(self.exchanges)) as executor:
             future_to_exchange = {
-                executor.submit(self._fetch_exchange_rates, name, exchange, symbols): name 
+                executor.submit(self._fetch_exchange_rates, name, exchange, symbols): name
                 for name, exchange in self.exchanges.items()
             }
-            
+
             for future in concurrent.futures.as_completed(future_to_exchange):
                 name = future_to_exchange[future]
                 try:
-                    rates = future.result()
-                    if rates:
-                        all_rates.extend(rates)
+                    symbols_found, rates, next_fts = future.result()
                 except Exception as e:
                     print(f"Error fetching from {name}: {e}")
+                    continue
+                if symbols_found:
+                    yield {
+                        'exchange': name,
+                        'symbols': symbols_found,
+                        'funding_rates': rates,
+                        'next_funding_times': next_fts,
+                    }
+
+    def fetch_funding_rates(self, symbols=None):
+        """
+        Fetches funding rates from all configured exchanges in parallel.
+        Returns a DataFrame with the data.
+        """
+        # Column-parallel accumulators (SoA): building the DataFrame from
+        # whole columns skips the dict-to-column transpose pd.DataFrame does
+        # on a list of 10k+ row dicts.
+        ex_col = []
+        sym_col = []
+        rate_col = []
+        ntf_col = []
 
-        return pd.DataFrame(all_rates)
+        for chunk in self.iter_funding_rates(symbols):
+            ex_col.extend([chunk['exchange']] * len(chunk['symbols']))
+            sym_col.extend(chunk['symbols'])
+            rate_col.extend(chunk['funding_rates'])
+            ntf_col.extend(chunk['next_funding_times'])
+
+        if not sym_col:
+            return pd.DataFrame()
+
+        return pd.DataFrame({
+            'exchange': ex_col,
+            'symbol': sym_col,
+            # NumPy-backed columns skip per-row boxing. float32 is ample for
+            # funding rates (1e-5..1e-3 range) and halves the bandwidth of
+            # the downstream rate matrices; unknown next-funding times
+            # become 0, which consumers already treat as "unknown".
+            'funding_rate': np.asarray(rate_col, dtype=np.float32),
+            'next_funding_time': np.fromiter(
+                (ts or 0 for ts in ntf_col), dtype=np.int64, count=len(ntf_col)),
+        })
 
     def _fetch_exchange_rates(self, name, exchange, symbols):
-        """Helper method to fetch rates from a single exchange safe for threading."""
-        exchange_rates = []
+        """
+        Helper method to fetch rates from a single exchange safe for threading.
+        Returns parallel lists (symbols, funding_rates, next_funding_times).
+        """
+        symbols_out = []
+        rates_out = []
+        ntf_out = []
         try:
             # Load markets if needed (check if loaded first to avoid redundant calls if possible,
             # but load_markets is usually necessary for safe multi-threaded use in some ccxt versions 
             # or if not loaded yet)
             # Safe to call repeatedly, it caches
             exchange.timeout = 15000  # 15 seconds timeout
-            # Load markets if needed
+            # Load markets if needed (no-op if the preload already got them)
             exchange.load_markets()
+            self._markets[name] = exchange.markets
             
             # Force singular fetch for specific exchanges known to have bulk issues with ALL symbols
             force_singular = [] # Toobit bulk check passed in debug
@@ -85,15 +217,11 @@ class ArbitrageScanner:
                 for symbol, data in rates.items():
                     funding_rate = data.get('fundingRate')
                     next_funding = data.get('nextFundingTime') or data.get('nextFundingRateTimestamp')
-                    
+
                     if funding_rate is not None:
-                        exchange_rates.append({
-                            'exchange': name,
-                            'symbol': symbol,
-                            'funding_rate': funding_rate,
-                            'next_funding_time': next_funding,
-                            'timestamp': datetime.now()
-                        })
+                        symbols_out.append(symbol)
+                        rates_out.append(funding_rate)
+                        ntf_out.append(next_funding)
             else:
                 # Fallback to singular fetch (loop)
                 # If symbols is None, we need to populate it with ALL swap symbols
@@ -106,10 +234,10 @@ class ArbitrageScanner:
                         if exchange.markets[s].get('swap') and exchange.markets[s].get('linear')
                     ]
                     # Skip if too many symbols for singular fetch to avoid stalls
-                    if len(target_symbols) > 20: 
+                    if len(target_symbols) > 20:
                         print(f"Skipping {name} (No bulk fetch support, >20 symbols: {len(target_symbols)})")
                         self.skipped_exchanges.append(f"{name} ({len(target_symbols)} symbols)")
-                        return []
+                        return [], [], []
 
                     # Print warning if we are scanning hundreds of symbols one by one
                     print(f"Warning: Singular fetching {len(target_symbols)} symbols for {name}")
@@ -123,13 +251,9 @@ class ArbitrageScanner:
                                 next_funding = data.get('nextFundingTime') or data.get('nextFundingRateTimestamp')
                                 
                                 if funding_rate is not None:
-                                    exchange_rates.append({
-                                        'exchange': name,
-                                        'symbol': symbol,
-                                        'funding_rate': funding_rate,
-                                        'next_funding_time': next_funding,
-                                        'timestamp': datetime.now()
-                                    })
+                                    symbols_out.append(symbol)
+                                    rates_out.append(funding_rate)
+                                    ntf_out.append(next_funding)
                         except Exception as e:
                             # Log specific symbol error but don't fail the whole exchange
                             # print(f"Error fetching {symbol} from {name}: {e}") 
@@ -139,8 +263,8 @@ class ArbitrageScanner:
 
         except Exception as e:
             print(f"Error processing {name}: {e}")
-            
-        return exchange_rates
+
+        return symbols_out, rates_out, ntf_out
 
     def calculate_arbitrage(self, df):
         """
@@ -156,37 +280,33 @@ class ArbitrageScanner:
             values='funding_rate'
         )
         
-        opportunities = []
-        
-        for symbol, row in pivot_df.iterrows():
-            # Get valid rates for this symbol
-            rates = row.dropna()
-            if len(rates) < 2:
-                continue
-                
-            min_rate = rates.min()
-            max_rate = rates.max()
-            min_exchange = rates.idxmin()
-            max_exchange = rates.idxmax()
-            
-            spread = max_rate - min_rate
-            
-            # Filter for meaningful spreads (User requested > 0.5% originally, lowered to 0.1%)
-            if spread > 0.001: 
-                opportunities.append({
-                    'symbol': symbol,
-                    'long_exchange': min_exchange,
-                    'long_rate': min_rate,
-                    'short_exchange': max_exchange,
-                    'short_rate': max_rate,
-                    'spread': spread,
-                    'annualized_spread': spread * 3 * 365 # Approx 3 times a day * 365 days
-                })
-                
-        if not opportunities:
+        # Row-wise min/max/idxmin/idxmax in four column-engine passes instead
+        # of a Python loop over symbols.
+        # Need rates from at least 2 exchanges for a spread
+        pivot_df = pivot_df[pivot_df.notna().sum(axis=1) >= 2]
+        if pivot_df.empty:
+            return pd.DataFrame()
+
+        min_rate = pivot_df.min(axis=1)
+        max_rate = pivot_df.max(axis=1)
+        spread = max_rate - min_rate
+
+        # Filter for meaningful spreads (User requested > 0.5% originally, lowered to 0.1%)
+        mask = (spread > 0.001).to_numpy()
+        if not mask.any():
             return pd.DataFrame()
 
-        return pd.DataFrame(opportunities).sort_values('spread', ascending=False)
+        selected = pivot_df[mask]
+
+        return pd.DataFrame({
+            'symbol': selected.index.to_numpy(),
+            'long_exchange': selected.idxmin(axis=1).to_numpy(),
+            'long_rate': min_rate[mask].to_numpy(),
+            'short_exchange': selected.idxmax(axis=1).to_numpy(),
+            'short_rate': max_rate[mask].to_numpy(),
+            'spread': spread[mask].to_numpy(),
+            'annualized_spread': spread[mask].to_numpy() * 3 * 365 # Approx 3 times a day * 365 days
+        }).sort_values('spread', ascending=False)
         
     
     def get_funding_interval(self, exchange_name, symbol):
@@ -194,19 +314,25 @@ class ArbitrageScanner:
         Returns the funding interval in hours (e.g. 1, 4, 8).
         Only called for candidates to minimize API calls.
         """
+        key = (exchange_name, symbol)
+        cached = self._int_cache.get(key)
+        if cached is not None and time.monotonic() - cached[1] < INTERVAL_CACHE_TTL:
+            return cached[0]
+
+        interval = self._get_funding_interval_uncached(exchange_name, symbol)
+        self._int_cache[key] = (interval, time.monotonic())
+        return interval
+
+    def _get_funding_interval_uncached(self, exchange_name, symbol):
         try:
             exchange = self.exchanges.get(exchange_name)
             if not exchange:
                 return 8 # Default
-            
-            # Ensure markets loaded
-            if not exchange.markets:
-                exchange.load_markets()
-                
-            if symbol not in exchange.markets:
+
+            market = self._markets.get(exchange_name, {}).get(symbol)
+            if market is None:
                 return 8
-                
-            market = exchange.market(symbol)
+
             info = market.get('info', {})
             
             # 1. Check direct 'fundingInterval' (Bybit, etc.)
@@ -217,18 +343,12 @@ class ArbitrageScanner:
                     if val > 24: # It's minutes
                         return val / 60
                     return val # It's hours
-                except:
-                    pass
-            
-            # 2. Check 'fundingInterval' in root market dict (ccxt standardized?)
-            if 'fundingInterval' in market and market['fundingInterval']:
-                 try:
-                    # ccxt typically standardizes to milliseconds or string?
-                    # verification needed, but fallback is safe.
-                    pass
-                 except:
+                except (ValueError, TypeError):
                     pass
 
+            # 2. 'fundingInterval' in the root market dict is not reliably
+            # standardized by ccxt, so fall through to history inference.
+
             # 3. History Inference (OKX, etc.)
             if exchange.has['fetchFundingRateHistory']:
                 try:
@@ -242,8 +362,8 @@ class ArbitrageScanner:
                         diff_ms = t_last - t_prev
                         if diff_ms > 0:
                             return diff_ms / 3600000 # Convert ms to hours
-                except Exception as e:
-                    # print(f"Interval inference failed for {exchange_name}: {e}")
+                except (ccxt.NetworkError, ccxt.ExchangeError):
+                    # print(f"Interval inference failed for {exchange_name}")
                     pass
                     
             return 8 # Default standard
@@ -251,16 +371,68 @@ class ArbitrageScanner:
             # print(f"Error getting interval for {exchange_name}: {e}")
             return 8
 
+    def get_fees(self, exchange_name, symbol):
+        """
+        Returns (taker, maker) fees for the symbol.
+        Falls back to standard perp fees (0.05% taker, 0.02% maker).
+        """
+        key = (exchange_name, symbol)
+        cached = self._fee_cache.get(key)
+        if cached is not None and time.monotonic() - cached[1] < FEE_CACHE_TTL:
+            return cached[0]
+
+        try:
+            m = self._markets.get(exchange_name, {}).get(symbol)
+            if m is None:
+                fees = (0.0005, 0.0002) # Default
+            else:
+                # Try to get fee tiers, otherwise default to taker/maker
+                taker = m.get('taker', m.get('feeSide', 'get') == 'get' and 0.0005) # Fallback 0.05%
+                maker = m.get('maker', m.get('feeSide', 'make') == 'make' and 0.0002) # Fallback 0.02%
+                # Helper: standard perps usually 0.05% taker, 0.02% maker
+                if taker is None: taker = 0.0005
+                if maker is None: maker = 0.0002
+                fees = (taker, maker)
+        except (KeyError, AttributeError, ccxt.BaseError):
+            # Missing symbols are common; a bare except would also swallow
+            # KeyboardInterrupt and real bugs
+            fees = (0.0005, 0.0002)
+
+        self._fee_cache[key] = (fees, time.monotonic())
+        return fees
+
     def get_volume_1h(self, exchange_name, symbol):
         """
         Fetches the average 1-minute volume for the last 60 minutes.
         Returns volume in USD or None if failed.
         """
+        key = (exchange_name, symbol)
+        cached = self._vol_cache.get(key)
+        if cached is not None and time.monotonic() - cached[1] < VOLUME_CACHE_TTL:
+            return cached[0]
+
+        volume = self._get_volume_1h_uncached(exchange_name, symbol)
+        self._vol_cache[key] = (volume, time.monotonic())
+        return volume
+
+    def _get_volume_1h_uncached(self, exchange_name, symbol):
         try:
             exchange = self.exchanges.get(exchange_name)
             if not exchange:
                 return None
-                
+
+            # Fast path: one lightweight ticker call. The 24h quote volume
+            # divided by 1440 approximates the 1-minute average, which is
+            # plenty of precision for a threshold filter and much cheaper
+            # than a 60-candle OHLCV payload.
+            if exchange.has.get('fetchTicker'):
+                try:
+                    quote_volume = exchange.fetch_ticker(symbol).get('quoteVolume')
+                    if quote_volume:
+                        return quote_volume / 1440.0
+                except (ccxt.NetworkError, ccxt.ExchangeError):
+                    pass
+
             if not exchange.has['fetchOHLCV']:
                 return None
                 
@@ -274,19 +446,9 @@ class ArbitrageScanner:
             # Sum of (Volume * ClosePrice) / Count? Or just sum of volume?
             # User asked: "VOLUMEN PROMEDIO POR MINUTO DE LOS ULTIMOS 60 MINUTOS"
             # So we calculate volume * price (quote volume) for each minute, then average it.
-            
-            volumes_usd = []
-            for candle in ohlcv:
-                # [timestamp, open, high, low, close, volume]
-                close = candle[4]
-                vol = candle[5]
-                volumes_usd.append(close * vol)
-                
-            if not volumes_usd:
-                return 0
-                
-            avg_vol = sum(volumes_usd) / len(volumes_usd)
-            return avg_vol
+            # Columns: [timestamp, open, high, low, close, volume]
+            a = np.asarray(ohlcv, dtype=np.float64)
+            return float(np.dot(a[:, 4], a[:, 5]) / a.shape[0])
             
         except Exception as e:
             # print(f"Error fetching volume for {symbol} on {exchange_name}: {e}")